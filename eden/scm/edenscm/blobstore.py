@@ -35,6 +35,30 @@ class localblobstore(object):
         with self.vfs(oid, "wb", atomictemp=True) as fp:
             fp.write(data)
 
+        self._linktocache(oid)
+
+    def writestream(self, oid, chunks):
+        """Write blob to local blobstore from an iterable of chunks.
+
+        The content is hashed while it is written, so the blob is never held in
+        memory as a whole. Nothing is written if the content doesn't match the
+        oid or if iterating the chunks raises.
+        """
+        hasher = hashlib.sha256()
+        with self.vfs(oid, "wb", atomictemp=True) as fp:
+            for chunk in chunks:
+                hasher.update(chunk)
+                fp.write(chunk)
+            contentsha256 = hasher.hexdigest()
+            if contentsha256 != oid:
+                raise error.Abort(
+                    _("blobstore: sha256 mismatch (oid: %s, content: %s)")
+                    % (oid, contentsha256)
+                )
+
+        self._linktocache(oid)
+
+    def _linktocache(self, oid):
         # XXX: should we verify the content of the cache, and hardlink back to
         # the local store on success, but truncate, write and link on failure?
         if self.cachevfs and not self.cachevfs.exists(oid):
@@ -75,6 +99,9 @@ class memlocal(object):
     def write(self, oid, data):
         self._files[oid] = data
 
+    def writestream(self, oid, chunks):
+        self._files[oid] = b"".join(chunks)
+
     def read(self, oid):
         return self._files[oid]
 
@@ -108,6 +135,9 @@ class unionstore(object):
     def write(self, oid, data):
         self.diskstore.write(oid, data)
 
+    def writestream(self, oid, chunks):
+        self.diskstore.writestream(oid, chunks)
+
     def read(self, oid):
         if self.memstore.has(oid):
             return self.memstore.read(oid)
@@ -147,6 +147,7 @@ def _backup(
         backupstate.heads,
     )
 
-    backupstate.update(unfi.nodes("%ld", backedup))
+    if backedup:
+        backupstate.update(unfi.nodes("%ld", backedup))
 
     return backedup, failed
@@ -157,13 +157,12 @@ def cloudjoin(ui, repo, **opts):
     Use `@prog@ cloud sync` to trigger a new backup and synchronization.
     """
 
-    checkauthenticated(ui, repo)
-
     workspacename = workspace.parseworkspace(ui, opts)
     if workspacename is None:
         workspacename = workspace.defaultworkspace(ui)
 
     currentworkspace = workspace.currentworkspace(repo)
+    reponame = ccutil.getreponame(repo)
 
     switch = opts.get("switch")
     merge = opts.get("merge")
@@ -183,11 +182,17 @@ def cloudjoin(ui, repo, **opts):
             _(
                 "this repository has been already connected to the '%s' workspace for the '%s' repo\n"
             )
-            % (workspacename, ccutil.getreponame(repo)),
+            % (workspacename, reponame),
             component="commitcloud",
         )
+        # Authentication isn't checked separately here. An unauthenticated
+        # sync still backs up local commits first and only fails at its first
+        # commit cloud request (or doesn't make one if the version is already
+        # synced), trading failing fast for one less round trip.
         return cloudsync(ui, repo, **opts)
 
+    checkauthenticated(ui, repo)
+
     # Check the current workspace and perform necessary clean up.
     # If the local repository is already connected to some workspace,
     # make sure that we perform correct merge or switch.
@@ -205,7 +210,6 @@ def cloudjoin(ui, repo, **opts):
             return 1
 
         serv = service.get(ui)
-        reponame = ccutil.getreponame(repo)
         # check that the workspace exists if the destination workspace
         # doesn't equal to the default workspace for the current user
         if not create and workspace != workspace.defaultworkspace(ui):
@@ -335,7 +339,7 @@ def cloudjoin(ui, repo, **opts):
     workspace.setworkspace(repo, workspacename)
     ui.status(
         _("this repository is now connected to the '%s' workspace for the '%s' repo\n")
-        % (workspacename, ccutil.getreponame(repo)),
+        % (workspacename, reponame),
         component="commitcloud",
     )
     cloudsync(ui, repo, **opts)
@@ -369,11 +373,11 @@ def cloudrejoin(ui, repo, **opts):
 
     active = []
     try:
+        reponame = ccutil.getreponame(repo)
         workspacename = workspace.parseworkspace(ui, opts)
         if workspacename is None:
             # If the workspace name is not given, figure out the sensible default.
             # The specific hostname workspace will be preferred over the default workspace.
-            reponame = ccutil.getreponame(repo)
             hostnameworkspace = workspace.hostnameworkspace(ui)
             winfos = service.get(ui).getworkspaces(
                 reponame, workspace.userworkspaceprefix(ui)
@@ -388,7 +392,7 @@ def cloudrejoin(ui, repo, **opts):
 
         ui.status(
             _("attempting to connect to the '%s' workspace for the '%s' repo\n")
-            % (workspacename, ccutil.getreponame(repo)),
+            % (workspacename, reponame),
             component="commitcloud",
         )
 
@@ -701,6 +705,9 @@ def cloudmove(ui, repo, *revs, **opts):
 
     repo.ignoreautobackup = True
 
+    # read the connected workspace once, it is needed several times below
+    currentworkspace = workspace.currentworkspace(repo)
+
     destination = opts.get("destination")
     rawdestination = opts.get("raw_destination")
 
@@ -711,7 +718,7 @@ def cloudmove(ui, repo, *revs, **opts):
 
     if destination:
         if destination == ".":
-            destinationworkspace = workspace.currentworkspace(repo)
+            destinationworkspace = currentworkspace
         else:
             destinationworkspace = workspace.userworkspaceprefix(ui) + destination
     else:
@@ -728,14 +735,14 @@ def cloudmove(ui, repo, *revs, **opts):
 
     if source:
         if source == ".":
-            sourceworkspace = workspace.currentworkspace(repo)
+            sourceworkspace = currentworkspace
         else:
             sourceworkspace = workspace.userworkspaceprefix(ui) + source
     else:
         if rawsource:
             sourceworkspace = rawsource
         else:
-            sourceworkspace = workspace.currentworkspace(repo)
+            sourceworkspace = currentworkspace
 
     if not sourceworkspace:
         raise error.Abort(
@@ -754,7 +761,6 @@ def cloudmove(ui, repo, *revs, **opts):
 
     serv = service.get(ui)
     reponame = ccutil.getreponame(repo)
-    currentworkspace = workspace.currentworkspace(repo)
 
     # Validate source workspace
     if sourceworkspace != currentworkspace:
@@ -875,17 +881,24 @@ def cloudrollback(ui, repo, *revs, **opts):
     """rollback your commit cloud workspace to a specific version that you can get browsing `hg cloud sl --history`"""
     repo.ignoreautobackup = True
 
+    # validate the arguments before touching the repo or the service
+    version = opts.get("to_version")
+    if not version:
+        raise error.Abort(_("workspace version must be specified"))
+    try:
+        version = int(version)
+    except ValueError:
+        raise error.Abort(
+            _("error: argument 'to-version': invalid int value: '%s'") % version
+        )
+
+    currentworkspace = workspace.currentworkspace(repo)
     workspacename = workspace.parseworkspace(ui, opts)
     if workspacename is None:
-        workspacename = workspace.currentworkspace(repo)
+        workspacename = currentworkspace
     if workspacename is None:
         raise error.Abort(_("the repo is not connected to any workspace"))
 
-    version = opts.get("to_version")
-    if not version:
-        raise error.Abort(_("workspace version must be specified"))
-
-    version = int(version)
     serv = service.get(ui)
     reponame = ccutil.getreponame(repo)
 
@@ -896,7 +909,7 @@ def cloudrollback(ui, repo, *revs, **opts):
     )
 
     # cloud sync before and after rollback for the current workspace
-    if workspacename == workspace.currentworkspace(repo):
+    if workspacename == currentworkspace:
         cloudsync(ui, repo, **opts)
         serv.rollbackworkspace(reponame, workspacename, version)
         cloudsync(ui, repo, **opts)
@@ -1029,6 +1042,8 @@ def cloudlistworspaces(ui, repo, **opts):
         ui.label(_("the following commitcloud workspaces are available:\n"), "bold")
     )
 
+    # collect the listing and write it at once, users can have many workspaces
+    lines = []
     anyconnected = False
     for winfo in active if activeonly else active + archived:
         fullname, shortname = (winfo.name, winfo.name[len(workspacenameprefix) :])
@@ -1037,9 +1052,9 @@ def cloudlistworspaces(ui, repo, **opts):
             shortname = ui.label(shortname, "bold")
             anyconnected = True
         if not winfo.archived:
-            ui.write(_("        %s%s\n") % (shortname, isconnected))
+            lines.append(_("        %s%s\n") % (shortname, isconnected))
         else:
-            ui.write(_("        %s%s (archived)\n") % (shortname, isconnected))
+            lines.append(_("        %s%s (archived)\n") % (shortname, isconnected))
 
     currentmayberenamed = (
         not user
@@ -1049,10 +1064,11 @@ def cloudlistworspaces(ui, repo, **opts):
     )
     # current workspace is missing on the server
     if currentmayberenamed:
-        ui.write(
+        lines.append(
             _("        %s (connected) (renamed or removed)\n")
             % ui.label(currentworkspace[len(workspacenameprefix) :], "bold")
         )
+    ui.write("".join(lines))
 
     ui.status(_("run `@prog@ cloud sl -w <workspace name>` to view the commits\n"))
 
@@ -1387,6 +1403,13 @@ def cloudsync(ui, repo, cloudrefs=None, **opts):
     elif ui.interactive():
         ui.log("commitcloud_sync_reason", commitcloud_sync_reason="manual run")
 
+    # Polling syncs usually ask for a version we already have, check that
+    # before taking any locks.
+    if maybeversion is not None and sync.isversionsynced(
+        repo, maybeversion, maybeworkspace
+    ):
+        return 0
+
     ret = sync.sync(
         repo,
         cloudrefs,
@@ -1441,31 +1464,30 @@ def cloudcheck(ui, repo, **opts):
 
     if ui.configbool("commitcloud", "usehttpupload") and remote:
         # eden api based lookup
-        nodestocheck = [repo[r].node() for r in revs]
+        nodestocheck = list(repo.nodes("%ld", revs))
         missingnodes = set(edenapi_upload._filtercommits(repo, nodestocheck))
         results = {
             helperkey: {nodemod.hex(n): n not in missingnodes for n in nodestocheck}
         }
     else:
-        nodestocheck = [repo[r].hex() for r in revs]
         if remote:
+            nodestocheck = [nodemod.hex(n) for n in repo.nodes("%ld", revs)]
             # wireproto based lookup
             remotepath = ccutil.getremotepath(ui)
             getconnection = lambda: repo.connectionpool.get(remotepath, opts)
-            isbackedup = {
-                nodestocheck[i]: res
-                for i, res in enumerate(
+            isbackedup = dict(
+                zip(
+                    nodestocheck,
                     dependencies.infinitepush.isbackedupnodes(
                         getconnection, nodestocheck
-                    )
+                    ),
                 )
-            }
+            )
         else:
-            # local backup state based lookup
-            backeduprevs = unfi.revs("backedup()")
+            # local backup state based lookup, public commits count as backed up
+            backedupnodes = set(unfi.nodes("%ld & (backedup() + public())", revs))
             isbackedup = {
-                node: (unfi[node].rev() in backeduprevs) or not unfi[node].mutable()
-                for node in nodestocheck
+                nodemod.hex(n): n in backedupnodes for n in repo.nodes("%ld", revs)
             }
 
         results = {helperkey: isbackedup}
@@ -1475,10 +1497,13 @@ def cloudcheck(ui, repo, **opts):
         ui.write(text)
         return
 
-    for n, result in results[helperkey].items():
-        ui.write(n, " ")
-        ui.write(_("backed up") if result else _("not backed up"))
-        ui.write(_("\n"))
+    backedup, notbackedup = _("backed up"), _("not backed up")
+    ui.write(
+        "".join(
+            "%s %s\n" % (n, backedup if result else notbackedup)
+            for n, result in results[helperkey].items()
+        )
+    )
 
 
 @subcmd("enable")
@@ -1508,9 +1533,6 @@ def backupdisable(ui, repo, **opts):
     Disables automatic background backup or sync for the specified duration.
     """
 
-    if not background.autobackupenabled(repo):
-        ui.write(_("background backup was already disabled\n"), notice=_("note"))
-
     try:
         duration = int(opts.get("hours", 1)) * 60 * 60
     except ValueError:
@@ -1522,6 +1544,9 @@ def backupdisable(ui, repo, **opts):
             )
         )
 
+    if not background.autobackupenabled(repo):
+        ui.write(_("background backup was already disabled\n"), notice=_("note"))
+
     timestamp = int(time.time()) + duration
     background.disableautobackup(repo, timestamp)
     ui.write(
@@ -53,6 +53,9 @@ class _HttpsCommitCloudService(baseservice.BaseService):
         self.debugrequests = ui.config("commitcloud", "debugrequests")
         self.url = ui.config("commitcloud", "url")
         self._sockettimeout = DEFAULT_TIMEOUT
+        # set once any request has been accepted by the service, so that
+        # explicit authentication checks don't cost an extra round trip
+        self._authenticated = False
         self.user_agent = "EdenSCM {}".format(util.version())
         self._unix_socket_proxy = (
             ui.config("auth_proxy", "unix_socket_path")
@@ -171,8 +174,10 @@ class _HttpsCommitCloudService(baseservice.BaseService):
                 resp = self.connection.getresponse()
 
                 if resp.status == int(httplib.UNAUTHORIZED):
+                    self._authenticated = False
                     raise ccerror.RegistrationError(self.ui, _("unauthorized client"))
                 if resp.status == int(httplib.FORBIDDEN):
+                    self._authenticated = False
                     raise ccerror.RegistrationError(self.ui, _("forbidden client"))
                 if resp.status == int(httplib.BAD_REQUEST):
                     raise ccerror.BadRequestError(self.ui, resp.reason.decode("utf-8"))
@@ -188,6 +193,7 @@ class _HttpsCommitCloudService(baseservice.BaseService):
                     self.ui.debug("%s\n" % json.dumps(cleandict(data)))
                 if "error" in data:
                     raise ccerror.ServiceError(self.ui, data["error"])
+                self._authenticated = True
                 return data
             except httplib.HTTPException as e:
                 lastretriableex = e
@@ -239,6 +245,15 @@ class _HttpsCommitCloudService(baseservice.BaseService):
         # workspace with that name for that repo.
         # TODO: Make this a dedicated request
 
+        if self._authenticated:
+            # a previous request in this process has already been accepted
+            # by the service, so there is nothing to check
+            self.ui.debug(
+                "skipping authentication check, already authenticated\n",
+                component="commitcloud",
+            )
+            return
+
         self.ui.debug(
             "sending empty 'get_references' request to check authentication\n",
             component="commitcloud",
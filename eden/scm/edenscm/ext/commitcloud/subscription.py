@@ -8,14 +8,16 @@ from __future__ import absolute_import
 import hashlib
 import os
 import socket
+import time
 
-from edenscm import vfs as vfsmod
+from edenscm import util, vfs as vfsmod
 from edenscm.i18n import _
 from edenscm.pycompat import encodeutf8
 
 from . import error as ccerror, util as ccutil, workspace
 
 
+@util.lrucachefunc
 def _uniquefilename(reporoot, reponame, workspacename):
     hash = hashlib.sha256(
         encodeutf8("\0".join([reporoot, reponame, workspacename]))
@@ -99,32 +101,55 @@ def _warn_service_not_running(ui):
     )
 
 
+# Timeout (in seconds) for connecting to the scm daemon on localhost
+_connecttimeout = 0.5
+
+# Don't probe the scm daemon again for this many seconds after it was last
+# seen running
+_servicelivenessttl = 5
+
+# Port -> time the scm daemon was last seen running on it
+_servicelastseen = {}
+
+
+def _isservicerunning(port):
+    now = time.monotonic()
+    lastseen = _servicelastseen.get(port)
+    if lastseen is not None and now - lastseen < _servicelivenessttl:
+        return True
+    try:
+        s = socket.create_connection(("127.0.0.1", port), timeout=_connecttimeout)
+    except socket.error:
+        _servicelastseen.pop(port, None)
+        return False
+    s.close()
+    _servicelastseen[port] = now
+    return True
+
+
 def _test_service_is_running(ui):
     port = ui.configint("commitcloud", "scm_daemon_tcp_port")
-    s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    if s.connect_ex(("127.0.0.1", port)):
+    if not _isservicerunning(port):
         _warn_service_not_running(ui)
-    s.close()
 
 
 def testservicestatus(repo):
     if not repo.ui.configbool("commitcloud", "subscription_enabled"):
         return False
     port = repo.ui.configint("commitcloud", "scm_daemon_tcp_port")
-    s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    status = s.connect_ex(("127.0.0.1", port)) == 0
-    s.close()
-    return status
+    return _isservicerunning(port)
 
 
 def _restart_subscriptions(ui, warn_service_not_running=True):
     port = ui.configint("commitcloud", "scm_daemon_tcp_port")
-    s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
     try:
-        s.connect(("127.0.0.1", port))
-        s.send(b'["commitcloud::restart_subscriptions", {}]')
+        with socket.create_connection(
+            ("127.0.0.1", port), timeout=_connecttimeout
+        ) as s:
+            s.sendall(b'["commitcloud::restart_subscriptions", {}]')
     except socket.error:
+        _servicelastseen.pop(port, None)
         if warn_service_not_running:
             _warn_service_not_running(ui)
-    finally:
-        s.close()
+    else:
+        _servicelastseen[port] = time.monotonic()
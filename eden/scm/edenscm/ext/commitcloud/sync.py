@@ -20,7 +20,6 @@ from edenscm import (
     node as nodemod,
     perftrace,
     progress,
-    pycompat,
     util,
     visibility,
 )
@@ -117,6 +116,53 @@ def sync(repo, *args, **kwargs):
         return rc
 
 
+def isversionsynced(repo, cloudversion, cloudworkspace=None):
+    """check if the given version of the current workspace has already been synced
+
+    This only reads the local sync state, so it can be used to skip taking
+    the backup lock and the repo locks when an external service (the scm
+    daemon) triggers a sync for a version we have already seen.
+    """
+    workspacename = workspace.currentworkspace(repo)
+    if workspacename is None:
+        return False
+    if cloudworkspace and workspacename != cloudworkspace:
+        return False
+    # Reading the sync state without the backup lock is safe: the state file
+    # is replaced atomically and its version only ever increases, so a stale
+    # read can only make us fall through to a full sync, which checks again
+    # under the locks.
+    lastsyncstate = syncstate.SyncState(repo, workspacename)
+    return _isversionsynced(
+        repo.ui,
+        ccutil.getreponame(repo),
+        workspacename,
+        cloudversion,
+        lastsyncstate,
+    )
+
+
+def _statussynchronizing(ui, reponame, workspacename):
+    ui.status(
+        _("synchronizing '%s' with '%s'\n") % (reponame, workspacename),
+        component="commitcloud",
+    )
+
+
+def _isversionsynced(ui, reponame, workspacename, cloudversion, lastsyncstate):
+    """check if the version an external service knows about is already synced
+
+    Reports it to the user if so.
+    """
+    if cloudversion is None or cloudversion > lastsyncstate.version:
+        return False
+    _statussynchronizing(ui, reponame, workspacename)
+    ui.status(
+        _("this version has been already synchronized\n"), component="commitcloud"
+    )
+    return True
+
+
 def _hashrepostate(repo) -> bytes:
     """hash repo states that affect commit cloud sync
 
@@ -160,28 +206,23 @@ def _sync(
         ui.status(_("current workspace is different than the workspace to sync\n"))
         return 1, None
 
-    ui.status(
-        _("synchronizing '%s' with '%s'\n") % (reponame, workspacename),
-        component="commitcloud",
-    )
+    lastsyncstate = syncstate.SyncState(repo, workspacename)
+
+    # External services may already know the version number.  Check if we're
+    # already up-to-date.
+    if _isversionsynced(ui, reponame, workspacename, cloudversion, lastsyncstate):
+        return 0, None
+
+    _statussynchronizing(ui, reponame, workspacename)
     backuplock.progress(repo, "starting synchronizing with '%s'" % workspacename)
 
     # Work out what version to fetch updates from.
-    lastsyncstate = syncstate.SyncState(repo, workspacename)
     fetchversion = lastsyncstate.version
     if maxage != lastsyncstate.maxage:
         # We are doing a full sync, or maxage has changed since the last sync,
         # so get a fresh copy of the full state.
         fetchversion = 0
 
-    # External services may already know the version number.  Check if we're
-    # already up-to-date.
-    if cloudversion is not None and cloudversion <= lastsyncstate.version:
-        ui.status(
-            _("this version has been already synchronized\n"), component="commitcloud"
-        )
-        return 0, None
-
     # Connect to the commit cloud service.
     serv = service.get(ui)
 
@@ -409,11 +450,10 @@ def _applycloudchanges(repo, remotepath, lastsyncstate, cloudrefs, maxage, state
     # Pull all the new heads and any bookmark hashes we don't have. We need to
     # filter cloudrefs before pull as pull doesn't check if a rev is present
     # locally.
+    cloudheadnodes = list(map(nodemod.bin, cloudrefs.heads))
     newheads = [
         nodemod.hex(n)
-        for n in repo.changelog.filternodes(
-            [nodemod.bin(h) for h in cloudrefs.heads], inverse=True
-        )
+        for n in repo.changelog.filternodes(cloudheadnodes, inverse=True)
     ]
     assert newheads == newheads
     if maxage is not None and maxage >= 0:
@@ -460,10 +500,10 @@ def _applycloudchanges(repo, remotepath, lastsyncstate, cloudrefs, maxage, state
         cloudheads = [head for head in cloudrefs.heads if head not in omittedheads]
         cloudheadsset = set(cloudheads)
         if localheadsset != cloudheadsset:
+            # omittedheads is a list, use a set for the membership tests
+            lastomittedheads = set(lastsyncstate.omittedheads)
             oldvisibleheads = [
-                head
-                for head in lastsyncstate.heads
-                if head not in lastsyncstate.omittedheads
+                head for head in lastsyncstate.heads if head not in lastomittedheads
             ]
             newvisibleheads = util.removeduplicates(
                 oldvisibleheads + cloudheads + localheads
@@ -520,10 +560,7 @@ def _applycloudchanges(repo, remotepath, lastsyncstate, cloudrefs, maxage, state
         # record all cloudrefs.heads that are present in the repo as backed up,
         # not only the pulled commits that are missing locally (newheads)
         # Some commits could be in the repo already, so the pull would skip them.
-        state.update(
-            repo.changelog.filternodes([nodemod.bin(n) for n in cloudrefs.heads]),
-            tr,
-        )
+        state.update(repo.changelog.filternodes(cloudheadnodes), tr)
     else:
         # Update backup state.  These new heads are already backed up,
         # otherwise the server wouldn't have told us about them.
@@ -543,23 +580,20 @@ def _applycloudchanges(repo, remotepath, lastsyncstate, cloudrefs, maxage, state
 
 
 def _pullheadgroups(repo, remotepath, headgroups):
+    binheadgroups = [[nodemod.bin(head) for head in group] for group in headgroups]
     backuplock.progresspulling(
-        repo, [nodemod.bin(node) for newheads in headgroups for node in newheads]
+        repo, [node for binheads in binheadgroups for node in binheads]
     )
+    url = repo.ui.paths.getpath(remotepath).url
     with progress.bar(
         repo.ui, _("pulling from commit cloud"), total=len(headgroups)
     ) as prog:
-        for index, headgroup in enumerate(headgroups):
+        for index, (headgroup, binheads) in enumerate(zip(headgroups, binheadgroups)):
             headgroupstr = " ".join([head[:12] for head in headgroup])
-            url = repo.ui.paths.getpath(remotepath).url
             repo.ui.status(_("pulling %s from %s\n") % (headgroupstr, url))
             prog.value = (index, headgroupstr)
             with repo.ui.timesection("commitcloud_sync_pull"):
-                repo.pull(
-                    remotepath,
-                    headnodes=[nodemod.bin(hexnode) for hexnode in headgroup],
-                    quiet=False,
-                )
+                repo.pull(remotepath, headnodes=binheads, quiet=False)
             repo.connectionpool.close()
 
 
@@ -653,11 +687,15 @@ def _processremotebookmarks(repo, cloudremotebooks, lastsyncstate):
         remote, name = bookmarks.splitremotename(name)
         return not repo._scratchbranchmatcher.match(name)
 
-    unfi = repo
+    # check which nodes are missing locally with a single lookup rather than
+    # going through repo.__contains__ for each remote bookmark
+    candidates = [
+        nodemod.bin(node)
+        for name, node in updates.items()
+        if node != nodemod.nullhex and ispublic(name)
+    ]
     newnodes = set(
-        node
-        for name, node in pycompat.iteritems(updates)
-        if node != nodemod.nullhex and node not in unfi and ispublic(name)
+        nodemod.hex(n) for n in repo.changelog.filternodes(candidates, inverse=True)
     )
     return (updates, newnodes)
 
@@ -668,17 +706,22 @@ def _updateremotebookmarks(repo, tr, updates):
     protectednames = _getprotectedremotebookmarks(repo)
     newremotebookmarks = {}
     omittedremotebookmarks = []
-    unfi = repo
+    knownnodes = set(
+        nodemod.hex(n)
+        for n in repo.changelog.filternodes(
+            [nodemod.bin(node) for node in updates.values() if node != nodemod.nullhex]
+        )
+    )
 
     # Filter out any deletions of default names.  These are protected and shouldn't
     # be deleted if this is the default remote
-    for remotename, node in pycompat.iteritems(updates):
+    for remotename, node in updates.items():
         remote, name = bookmarks.splitremotename(remotename)
         if node == nodemod.nullhex and remotename in protectednames:
             newremotebookmarks[remotename] = oldremotebookmarks.get(
                 remotename, nodemod.nullhex
             )
-        elif node != nodemod.nullhex and node not in unfi:
+        elif node != nodemod.nullhex and node not in knownnodes:
             omittedremotebookmarks.append(name)
             newremotebookmarks[remotename] = nodemod.nullhex
         else:
@@ -848,11 +891,16 @@ def _mergebookmarks(repo, tr, cloudbookmarks, lastsyncstate, omittedheads, maxag
     return list(omittedbookmarks)
 
 
+@util.lrucachefunc
+def _forksuffixre(hostname):
+    return re.compile(r"-%s(-[0-9]*)?\Z" % re.escape(hostname))
+
+
 def _forkname(ui, name, othernames):
     hostname = ui.config("commitcloud", "hostname", socket.gethostname())
 
     # Strip off any old suffix.
-    m = re.match("-%s(-[0-9]*)?$" % re.escape(hostname), name)
+    m = _forksuffixre(hostname).match(name)
     if m:
         suffix = "-%s%s" % (hostname, m.group(1) or "")
         name = name[0 : -len(suffix)]
@@ -889,21 +937,24 @@ def _checkomissions(repo, lastsyncstate, tr, maxage):
     foundheads = {nodemod.hex(n) for n in foundheads}
     omittedheads = lastomittedheads - foundheads
 
-    lastbookmarknodes = [
-        lastsyncstate.bookmarks[name]
-        for name in lastomittedbookmarks
-        if name in lastsyncstate.bookmarks
-    ]
-    lastremotebookmarknodes = [
-        lastsyncstate.remotebookmarks[name]
-        for name in lastomittedremotebookmarks
-        if name in lastsyncstate.remotebookmarks
-    ]
+    # Bookmarks and remote bookmarks often point at the same commits, so
+    # dedup the nodes and convert each of them only once.
+    lastbookmarknodes = util.removeduplicates(
+        [
+            lastsyncstate.bookmarks[name]
+            for name in lastomittedbookmarks
+            if name in lastsyncstate.bookmarks
+        ]
+        + [
+            lastsyncstate.remotebookmarks[name]
+            for name in lastomittedremotebookmarks
+            if name in lastsyncstate.remotebookmarks
+        ]
+    )
     foundbookmarkslocalnodes = {
         nodemod.hex(n)
         for n in repo.changelog.filternodes(
-            [nodemod.bin(n) for n in lastbookmarknodes + lastremotebookmarknodes],
-            local=True,
+            list(map(nodemod.bin, lastbookmarknodes)), local=True
         )
     }
 
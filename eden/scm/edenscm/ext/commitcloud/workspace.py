@@ -3,6 +3,7 @@
 # This software may be used and distributed according to the terms of the
 # GNU General Public License version 2.
 
+import os
 import socket
 from typing import List, Optional, Tuple
 
@@ -129,18 +130,43 @@ def parseworkspaceordefault(ui, repo, opts):
 
 filename = "commitcloudrc"
 
+# Parsed commitcloudrc files keyed by path. Each entry also records the file
+# stat it was parsed from, so the file is only re-read when it has changed.
+_configcache = {}
+
+
+def _readconfig(repo):
+    """Return the parsed commitcloudrc file or None if it doesn't exist"""
+    path = repo.svfs.join(filename)
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        _configcache.pop(path, None)
+        return None
+    statkey = (st.st_mtime_ns, st.st_size, st.st_ino)
+    cached = _configcache.get(path)
+    if cached is not None and cached[0] == statkey:
+        return cached[1]
+    with repo.svfs.open(filename, r"rb") as f:
+        cloudconfig = configloader.config()
+        cloudconfig.parse(f.read().decode("utf-8"), filename)
+    _configcache[path] = (statkey, cloudconfig)
+    return cloudconfig
+
+
+def _invalidate(repo) -> None:
+    _configcache.pop(repo.svfs.join(filename), None)
+
 
 def _get(repo, *names):
     """Read commitcloudrc file to get a value"""
-    if repo.svfs.exists(filename):
-        with repo.svfs.open(filename, r"rb") as f:
-            cloudconfig = configloader.config()
-            cloudconfig.parse(f.read().decode("utf-8"), filename)
-            return (
-                cloudconfig.get("commitcloud", names[0])
-                if len(names) == 1
-                else tuple(cloudconfig.get("commitcloud", name) for name in names)
-            )
+    cloudconfig = _readconfig(repo)
+    if cloudconfig is not None:
+        return (
+            cloudconfig.get("commitcloud", names[0])
+            if len(names) == 1
+            else tuple(cloudconfig.get("commitcloud", name) for name in names)
+        )
     else:
         return None if len(names) == 1 else tuple(None for name in names)
 
@@ -198,6 +224,7 @@ def setworkspace(repo, workspace) -> None:
             b"[commitcloud]\ncurrent_workspace=%s\nlocally_owned=%s\n"
             % (pycompat.encodeutf8(workspace), pycompat.encodeutf8(str(locallyowned)))
         )
+    _invalidate(repo)
 
 
 def clearworkspace(repo) -> None:
@@ -206,3 +233,4 @@ def clearworkspace(repo) -> None:
         filename, "wb", atomictemp=True
     ) as f:
         f.write(b"[commitcloud]\nis_disconnected=true\n")
+    _invalidate(repo)
@@ -8,6 +8,7 @@
 from __future__ import absolute_import
 
 import os
+import re
 
 from edenscm import (
     blobstore,
@@ -25,6 +26,9 @@ from edenscm import (
 from edenscm.i18n import _
 
 
+_oidre = re.compile(r"\A[0-9a-f]{64}\Z")
+
+
 class filewithprogress(object):
     """a file-like object that supports __len__ and read.
 
@@ -115,9 +119,21 @@ class _gitlfsremote(object):
         See https://github.com/git-lfs/git-lfs/blob/master/docs/api/batch.md
         """
         self.ui.log("lfs_url", lfs_url=self.baseurl)
-        objects = [{"oid": p.oid(), "size": p.size()} for p in pointers]
+        # The request has a fixed schema of oids and integer sizes, so format
+        # it directly rather than walking it with json.dumps. The output is the
+        # same as json.dumps would produce. Pointers built by the debug commands
+        # are not validated, so check the oids are hex before formatting them
+        # without escaping.
+        oids = [p.oid() for p in pointers]
+        for oid in oids:
+            if not _oidre.match(oid):
+                raise error.Abort(_("invalid LFS object id: %r") % oid)
+        objects = ", ".join(
+            '{"oid": "%s", "size": %d}' % (oid, p.size())
+            for oid, p in zip(oids, pointers)
+        )
         requestdata = pycompat.encodeutf8(
-            json.dumps({"objects": objects, "operation": action})
+            '{"objects": [%s], "operation": "%s"}' % (objects, action)
         )
         batchreq = util.urlreq.request(
             "%s/objects/batch" % self.baseurl, data=requestdata
@@ -189,9 +205,9 @@ class _gitlfsremote(object):
         See https://github.com/git-lfs/git-lfs/blob/master/docs/api/\
         basic-transfers.md
         """
-        oid = str(obj["oid"])
+        oid = obj["oid"]
 
-        href = str(obj["actions"][action].get("href"))
+        href = obj["actions"][action].get("href")
         headers = obj["actions"][action].get("header", {}).items()
 
         request = util.urlreq.request(href)
@@ -206,40 +222,50 @@ class _gitlfsremote(object):
         for k, v in headers:
             request.add_header(k, v)
 
-        blocks = []
-        contentlength = None
         try:
             res = self.urlopener.open(request)
-            contentlength = res.info().get("content-length")
-            while True:
-                data = res.read(1048576)
-                if not data:
-                    break
-                blocks.append(data)
         except util.urlerr.httperror as ex:
             raise LfsRemoteError(
                 _("HTTP error: %s (oid=%s, action=%s)") % (ex, oid, action)
             )
+        contentlength = res.info().get("content-length")
 
-        response = b"".join(blocks)
+        def readblocks():
+            responselength = 0
+            try:
+                while True:
+                    data = res.read(1048576)
+                    if not data:
+                        break
+                    responselength += len(data)
+                    yield data
+            except util.urlerr.httperror as ex:
+                raise LfsRemoteError(
+                    _("HTTP error: %s (oid=%s, action=%s)") % (ex, oid, action)
+                )
 
-        # If the server advertised a length longer than what we actually
-        # received, then we should expect that the server crashed while
-        # producing the response (but the server has no way of telling us
-        # that), and we really don't need to try to write the response to the
-        # localstore, because it's not going to match the expected.
-        responselength = len(response)
-        if contentlength is not None and int(contentlength) != responselength:
-            raise LfsRemoteError(
-                _(
-                    "Response length (%s) does not match Content-Length header (%s): likely server-side crash"
+            # If the server advertised a length longer than what we actually
+            # received, then we should expect that the server crashed while
+            # producing the response (but the server has no way of telling us
+            # that), and we really don't need to try to write the response to
+            # the localstore, because it's not going to match the expected.
+            # Raising here discards the partially written blob.
+            if contentlength is not None and int(contentlength) != responselength:
+                raise LfsRemoteError(
+                    _(
+                        "Response length (%s) does not match Content-Length header (%s): likely server-side crash"
+                    )
+                    % (responselength, contentlength)
                 )
-                % (responselength, contentlength)
-            )
 
         if action == "download":
-            # If downloading blobs, store downloaded data to local blobstore
-            localstore.write(oid, response)
+            # If downloading blobs, stream downloaded data to local blobstore
+            localstore.writestream(oid, readblocks())
+        else:
+            # The upload response is only read to check it against the
+            # advertised Content-Length.
+            for _block in readblocks():
+                pass
 
     def _batch(self, pointers, localstore, action, objectnames=None):
         if action not in ["upload", "download"]:
@@ -249,9 +275,7 @@ class _gitlfsremote(object):
         objects = self._extractobjects(response, pointers, action)
         total = sum(x.get("size", 0) for x in objects)
         perftrace.tracebytes("Size", total)
-        sizes = {}
-        for obj in objects:
-            sizes[obj.get("oid")] = obj.get("size", 0)
+        sizes = {obj.get("oid"): obj.get("size", 0) for obj in objects}
         topic = {"upload": _("lfs uploading"), "download": _("lfs downloading")}[action]
         if self.ui.verbose and len(objects) > 1:
             self.ui.write(
@@ -288,17 +312,16 @@ class _gitlfsremote(object):
 
         starttimestamp = util.timer()
         if action == "download":
-            oids = worker.worker(
-                self.ui,
-                0.1,
-                transfer,
-                (),
-                sorted(objects, key=lambda o: o.get("oid")),
-                preferthreads=True,
-                callsite="blobstore",
-            )
-        else:
-            oids = transfer(objects)
+            objects = sorted(objects, key=lambda o: o.get("oid"))
+        oids = worker.worker(
+            self.ui,
+            0.1,
+            transfer,
+            (),
+            objects,
+            preferthreads=True,
+            callsite="blobstore",
+        )
 
         transferred = 0
         with progress.bar(
@@ -364,8 +387,8 @@ class _dummyremote(object):
 
     def readbatch(self, pointers, tostore, objectnames=None):
         for p in pointers:
-            content = self.vfs.read(p.oid())
-            tostore.write(p.oid(), content)
+            with self.vfs(p.oid(), "rb") as fp:
+                tostore.writestream(p.oid(), util.filechunkiter(fp))
 
     def checkblobs(self, pointers):
         for p in pointers:
@@ -181,11 +181,15 @@ Test for infinitepushbackup disable
   note: background backup was already disabled
   commitcloud: background backup is now disabled until * (glob)
   $ hg cloud disable --hours ggg
-  note: background backup was already disabled
   abort: error: argument 'hours': invalid int value: 'ggg'
   
   [255]
 
+Test rollback rejects a non-integer --to-version
+  $ hg cloud rollback --to-version abc
+  abort: error: argument 'to-version': invalid int value: 'abc'
+  [255]
+
 Test sl when infinitepushbackup is disabled but disabling has been expired / not expired
   $ hg sl -T '{desc}\n'
   @  Not backed up changeset 3
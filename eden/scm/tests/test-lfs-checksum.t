@@ -37,3 +37,9 @@ Download it again in a fresh new repo - should fail
 
   $ [ -f A ]
   [1]
+
+The corrupted blob is not left in the local store, not even as a partially
+written temporary file
+
+  $ ls -AR .hg/store/lfs 2>/dev/null | grep 7548e627a92d9ce3f912eb71226f692ec83deed2e72298270b198540d7c70b
+  [1]